@@ -1,14 +1,19 @@
 import os
 import uvicorn
 from fastapi import FastAPI, HTTPException, Request, Depends
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from fastapi.encoders import jsonable_encoder
-from pydantic import BaseModel
-from typing import List, Dict, Any
-import psycopg2
-import psycopg2.extras
-from psycopg2.pool import SimpleConnectionPool
+from starlette.middleware.gzip import GZipMiddleware
+from typing import List, Dict, Any, Tuple
+import asyncio
+import contextlib
+import json
+import functools
+import hashlib
+import itertools
+import asyncpg
+import orjson
+from cachetools import TTLCache
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -19,104 +24,611 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 TABLES_ENV = os.getenv("TABLES")
 table_names = [table.strip() for table in TABLES_ENV.split(',')] if TABLES_ENV else []
 PORT = int(os.getenv("PORT", 8000))
+# Connection pool size; keep DB_POOL_MAX (times the number of app instances)
+# below the server's max_connections
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", 5))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", 20))
+# Prepared statements kept per connection (asyncpg's default is 100); 0 disables
+# them, which is required behind PgBouncer in transaction pooling mode
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", 256))
+# Seconds a GET /api/data response is served from memory; 0 disables the cache
+DATA_CACHE_TTL = float(os.getenv("DATA_CACHE_TTL", 30))
+# Total size of the cached responses in megabytes; larger responses are never cached
+DATA_CACHE_MAX_MB = float(os.getenv("DATA_CACHE_MAX_MB", 64))
+# Install change-notification triggers on the managed tables and serve
+# GET /api/data/{table}/stream; off by default because it alters the tables
+LIVE_UPDATES = os.getenv("LIVE_UPDATES", "").lower() in ("1", "true", "yes")
+# Directory for the on-disk schema cache; set to an empty value to disable it
+SCHEMA_CACHE_DIR = os.getenv("SCHEMA_CACHE_DIR", "/tmp")
 
 # --- Database connection pool setup ---
 if not DATABASE_URL:
     raise Exception("DATABASE_URL environment variable is not set.")
 
-# Create connection pool (minconn=1, maxconn=5)
-pool = SimpleConnectionPool(1, 5, dsn=DATABASE_URL)
+# All route handlers are async and await asyncpg directly; remaining blocking
+# work (file I/O) is run with asyncio.to_thread so it never stalls the event loop.
+# The asyncpg pool needs a running event loop, so it is created in lifespan()
+pool = None
 
-# --- FastAPI application setup ---
-app = FastAPI()
+# --- JSON serialization ---
+# Rows are sent as PostgreSQL's own JSON text; this only renders schemas and
+# other plain dicts of native types
+class OrjsonResponse(JSONResponse):
+    """JSON response rendered with orjson."""
 
-# Mount for serving static files (HTML, JS, CSS)
-app.mount("/static", StaticFiles(directory="public"), name="static")
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
 
 # Dictionary to store table schema information
 table_schemas = {}
 
+# Per-table {column_name: type} used to cast bound text parameters
+column_types = {}
+
+# Per-table {column_name: quoted identifier}, escaped once when schemas load
+quoted_columns = {}
+
+# Per-table set of array-typed columns, whose JSON lists are sent as array literals
+array_columns = {}
+
+# Per-table {(sort_by, sort_order): (row JSON SQL, json_agg SQL)} for every valid sort
+select_queries = {}
+# Sort key used when no sort_by is given: primary key order, if there is one
+DEFAULT_SORT = (None, None)
+
+# Valid values for the sort_order query parameter
+SORT_ORDERS = frozenset(("asc", "desc"))
+
+# index.html contents and ETag, read once on startup
+INDEX_HTML = b""
+INDEX_ETAG = ""
+
 # --- Database connection dependency ---
-def get_db_connection():
+async def get_db_connection():
     """Dependency function to get a database connection from the pool"""
-    conn = None
-    try:
-        conn = pool.getconn()
+    async with pool.acquire() as conn:
         yield conn
+
+# --- SQL parameter helpers ---
+def placeholders(table: str, columns, start: int = 1) -> List[str]:
+    """Returns asyncpg placeholders ($1, $2, ...) cast to each column's type.
+
+    Values are bound as text and cast server-side, so JSON input such as
+    "2024-01-01T10:00" for a timestamp column behaves as it did with psycopg2.
+    """
+    types = column_types.get(table, {})
+    return [f"${i}::text::{types[col]}" if col in types else f"${i}"
+            for i, col in enumerate(columns, start)]
+
+def quote_identifier(name: str) -> str:
+    """Returns name as a double-quoted SQL identifier."""
+    return '"' + name.replace('"', '""') + '"'
+
+def to_text(value, array: bool = False):
+    """Converts a JSON value to the text form PostgreSQL expects for a cast.
+
+    Lists for array columns become array literals, as psycopg2 adapted them
+    to ARRAY[...]; other lists and dicts are JSON for json/jsonb columns.
+    """
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if array and isinstance(value, list):
+        return array_literal(value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return str(value)
+
+def array_literal(values: list) -> str:
+    """Returns a list as a PostgreSQL array literal, e.g. {"1","2"} or {{"a"},{NULL}}."""
+    elements = []
+    for value in values:
+        if value is None:
+            elements.append("NULL")
+        elif isinstance(value, list):
+            elements.append(array_literal(value))
+        else:
+            text = to_text(value)
+            elements.append('"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"')
+    return "{" + ",".join(elements) + "}"
+
+# --- SQL statement templates ---
+# Rows are always returned as PostgreSQL's own JSON (row_to_json/json_agg, also
+# used by the change-notification trigger), so every endpoint represents a
+# value the same way. The table is aliased t; t.* is always the whole row,
+# while a bare t would mean a column named "t".
+ROW_JSON = "row_to_json(t.*)::text"
+
+# Keyed on the request's column tuple; the JSON from the UI always has the same
+# keys in the same order, so after the first request these are dictionary lookups
+# and values bind positionally in that order.
+def check_columns(table: str, columns: Tuple[str, ...]):
+    """Raises 400 if any of the columns is not in the table's schema."""
+    types = column_types[table]
+    unknown = [col for col in columns if col not in types]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown column(s): {', '.join(unknown)}")
+
+@functools.lru_cache(maxsize=256)
+def insert_statement(table: str, columns: Tuple[str, ...]) -> str:
+    """Returns the INSERT SQL for a tuple of columns, returning the new row as JSON."""
+    check_columns(table, columns)
+    if not columns:
+        return f'INSERT INTO "{table}" AS t DEFAULT VALUES RETURNING {ROW_JSON}'
+    quoted = quoted_columns[table]
+    cols_str = ", ".join([quoted[col] for col in columns])
+    vals_str = ", ".join(placeholders(table, columns))
+    return f'INSERT INTO "{table}" AS t ({cols_str}) VALUES ({vals_str}) RETURNING {ROW_JSON}'
+
+@functools.lru_cache(maxsize=256)
+def update_statement(table: str, columns: Tuple[str, ...]) -> str:
+    """Returns the UPDATE SQL for a tuple of columns, returning the updated row as JSON.
+
+    The primary key is bound as the last parameter.
+    """
+    check_columns(table, columns)
+    quoted = quoted_columns[table]
+    primary_key = table_schemas[table]["primaryKey"]
+    set_clause = ", ".join([f"{quoted[col]} = {ph}" for col, ph in zip(columns, placeholders(table, columns))])
+    pk_placeholder = placeholders(table, [primary_key], start=len(columns) + 1)[0]
+    return f'UPDATE "{table}" AS t SET {set_clause} WHERE {quoted[primary_key]} = {pk_placeholder} RETURNING {ROW_JSON}'
+
+def build_statements():
+    """Resets the statement caches and pre-builds the all-columns statements for each table."""
+    insert_statement.cache_clear()
+    update_statement.cache_clear()
+    quoted_columns.clear()
+    array_columns.clear()
+    select_queries.clear()
+    for table, types in column_types.items():
+        quoted = quoted_columns[table] = {col: quote_identifier(col) for col in types}
+        array_columns[table] = frozenset(col["column_name"] for col in table_schemas[table]["columns"]
+                                         if col["data_type"] == "ARRAY")
+        primary_key = table_schemas[table]["primaryKey"]
+        order_by_clauses = {DEFAULT_SORT: f"ORDER BY {quoted[primary_key]} ASC" if primary_key else ""}
+        for col in types:
+            for order in SORT_ORDERS:
+                order_by_clauses[(col, order)] = f"ORDER BY {quoted[col]} {order.upper()}"
+        # json_agg lets PostgreSQL build the JSON array, so no Python object is created per row
+        select_queries[table] = {
+            key: (f'SELECT {ROW_JSON} FROM "{table}" t {clause}',
+                  f'SELECT coalesce(json_agg(t.* {clause}), \'[]\')::text FROM "{table}" t')
+            for key, clause in order_by_clauses.items()
+        }
+        insert_statement(table, tuple(types))
+        if primary_key:
+            update_statement(table, tuple(col for col in types if col != primary_key))
+
+# --- Data response cache ---
+# Serialized GET /api/data responses keyed on (table, sort key). Writes
+# through this app drop a table's entries; other writers are picked up once the
+# TTL expires. Each process has its own cache.
+# Sized in bytes: every entry is a whole serialized table.
+data_cache = (TTLCache(maxsize=int(DATA_CACHE_MAX_MB * 1024 * 1024), ttl=DATA_CACHE_TTL, getsizeof=len)
+              if DATA_CACHE_TTL > 0 and DATA_CACHE_MAX_MB > 0 else None)
+# Per-table cache keys, so invalidation does not scan the whole cache
+data_cache_keys: Dict[str, set] = {}
+# Per-table write counter; a read only stores its result if no write finished meanwhile
+data_cache_generation: Dict[str, int] = {}
+
+def store_data(key: Tuple[str, str], generation: int, body: bytes):
+    """Caches a serialized response unless its table was written since the read began."""
+    table = key[0]
+    if data_cache is None or data_cache_generation.get(table, 0) != generation:
+        return
+    if len(body) > data_cache.maxsize:
+        return
+    data_cache[key] = body
+    data_cache_keys.setdefault(table, set()).add(key)
+
+def invalidate_data(table: str):
+    """Drops every cached response for a table."""
+    data_cache_generation[table] = data_cache_generation.get(table, 0) + 1
+    if data_cache is None:
+        return
+    for key in data_cache_keys.pop(table, ()):
+        data_cache.pop(key, None)
+
+async def fetch_table_json(table: str, sort_key: Tuple) -> bytes:
+    """Returns a table's rows as a JSON array, from the cache when possible."""
+    cache_key = (table, sort_key)
+    body = data_cache.get(cache_key) if data_cache is not None else None
+    if body is None:
+        generation = data_cache_generation.get(table, 0)
+        row_query, agg_query = select_queries[table][sort_key]
+        try:
+            async with pool.acquire() as conn:
+                try:
+                    body = (await conn.fetchval(agg_query)).encode()
+                except asyncpg.ProgramLimitExceededError:
+                    # json_agg cannot build a value over 1 GB; join the rows' JSON here instead
+                    body = json_array(row[0] for row in await conn.fetch(row_query))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error fetching data: {e}")
+        store_data(cache_key, generation, body)
+    return body
+
+# --- Live updates (LISTEN/NOTIFY) ---
+NOTIFY_CHANNEL = "pgsql_webui_changes"
+
+# Row-level trigger function sending {"t": table, "op": TG_OP, "row": {...}}.
+# NOTIFY payloads must stay under 8000 bytes, so large rows are sent without "row".
+NOTIFY_FUNCTION_BODY = """
+    DECLARE
+        payload text;
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            payload := json_build_object('t', TG_TABLE_NAME, 'op', TG_OP, 'row', row_to_json(OLD))::text;
+        ELSE
+            payload := json_build_object('t', TG_TABLE_NAME, 'op', TG_OP, 'row', row_to_json(NEW))::text;
+        END IF;
+        IF octet_length(payload) >= 8000 THEN
+            payload := json_build_object('t', TG_TABLE_NAME, 'op', TG_OP)::text;
+        END IF;
+        PERFORM pg_notify('pgsql_webui_changes', payload);
+        RETURN NULL;
+    END
+"""
+NOTIFY_FUNCTION_SQL = f"""
+    CREATE OR REPLACE FUNCTION public.pgsql_webui_notify() RETURNS trigger
+    LANGUAGE plpgsql AS $${NOTIFY_FUNCTION_BODY}$$;
+"""
+
+# Managed tables that already have the trigger
+NOTIFY_TRIGGERS_QUERY = """
+    SELECT c.relname
+    FROM pg_catalog.pg_trigger tg
+        JOIN pg_catalog.pg_class c ON c.oid = tg.tgrelid
+        JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+    WHERE tg.tgname = 'pgsql_webui_notify' AND n.nspname = 'public' AND c.relname = ANY($1::text[])
+"""
+
+# Seconds between keepalive comments on an idle event stream
+SSE_KEEPALIVE = 15
+# Changes buffered per client before it is sent a fresh snapshot instead
+SSE_QUEUE_SIZE = 256
+# Queued in place of a change when a client must be re-sent the snapshot
+RESYNC = object()
+
+# Per-table set of asyncio.Queue, one per connected event stream
+change_subscribers: Dict[str, set] = {}
+listener_conn = None
+# Reconnect task started when the listener connection drops; the event loop
+# only keeps a weak reference to tasks
+listener_task = None
+
+async def install_notify_triggers():
+    """Creates the change-notification function and triggers that are missing.
+
+    Existing triggers are left alone, so restarts and schema refreshes take no
+    locks on the tables; the function is only replaced when its body changed.
+    """
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            # Serializes installs by app instances starting at the same time
+            await conn.execute("SELECT pg_advisory_xact_lock(hashtext('pgsql_webui_notify'))")
+            current_body = await conn.fetchval(
+                "SELECT prosrc FROM pg_catalog.pg_proc WHERE oid = to_regprocedure('public.pgsql_webui_notify()')"
+            )
+            if current_body != NOTIFY_FUNCTION_BODY:
+                await conn.execute(NOTIFY_FUNCTION_SQL)
+            installed = {row['relname'] for row in await conn.fetch(NOTIFY_TRIGGERS_QUERY, list(table_schemas))}
+            missing = [table for table in table_schemas if table not in installed]
+            for table in missing:
+                await conn.execute(
+                    f'CREATE TRIGGER pgsql_webui_notify AFTER INSERT OR UPDATE OR DELETE ON "{table}" '
+                    'FOR EACH ROW EXECUTE FUNCTION public.pgsql_webui_notify()'
+                )
+    if missing:
+        print('Change-notification triggers installed for tables:', missing)
+
+def publish(queue: asyncio.Queue, item):
+    """Queues an item for one client, replacing its backlog with RESYNC if it is full."""
+    try:
+        queue.put_nowait(item)
+    except asyncio.QueueFull:
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(RESYNC)
+
+def on_table_change(conn, pid, channel, payload):
+    """Fans a NOTIFY payload out to the table's event streams."""
+    table = orjson.loads(payload)["t"]
+    # Also covers writes made outside this app
+    invalidate_data(table)
+    for queue in change_subscribers.get(table, ()):
+        publish(queue, payload)
+
+def on_listener_closed(conn):
+    """Reconnects after the listener connection drops."""
+    global listener_task
+    print("Warning: change listener connection lost, reconnecting.")
+    listener_task = asyncio.get_running_loop().create_task(start_listener(reconnect=True))
+
+async def start_listener(reconnect: bool = False):
+    """Opens the dedicated LISTEN connection, retrying until it succeeds.
+
+    On a reconnect, changes missed while LISTEN was down are covered by dropping
+    the cached responses and then re-sending every client a snapshot.
+    """
+    global listener_conn
+    while True:
+        conn = None
+        try:
+            conn = await asyncpg.connect(dsn=DATABASE_URL)
+            await conn.add_listener(NOTIFY_CHANNEL, on_table_change)
+            conn.add_termination_listener(on_listener_closed)
+            break
+        except Exception as e:
+            if conn is not None:
+                conn.terminate()
+            print("Error starting change listener, retrying in 5 seconds:", e)
+            await asyncio.sleep(5)
+    listener_conn = conn
+    if reconnect:
+        for table in table_names:
+            invalidate_data(table)
+        for queues in change_subscribers.values():
+            for queue in queues:
+                publish(queue, RESYNC)
+
+def sse_event(event: str, data: bytes) -> bytes:
+    """Formats one server-sent event; newlines in data become extra data lines."""
+    return b"event: " + event.encode() + b"\ndata: " + data.replace(b"\n", b"\ndata: ") + b"\n\n"
+
+async def change_events(table: str, queue: asyncio.Queue, snapshot: bytes):
+    """Yields a snapshot event, then a change event per row change of the table."""
+    try:
+        yield sse_event("snapshot", snapshot)
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), SSE_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            if item is RESYNC:
+                yield sse_event("snapshot", await fetch_table_json(table, DEFAULT_SORT))
+            else:
+                yield sse_event("change", item.encode())
     finally:
-        if conn:
-            pool.putconn(conn)
+        change_subscribers[table].discard(queue)
+
+# --- JSON streaming helpers ---
+# Rows fetched per round trip when streaming a table through a server-side cursor
+STREAM_BATCH_SIZE = 2000
+
+def json_array(items) -> bytes:
+    """Joins JSON texts into a JSON array."""
+    return b"[" + ",".join(items).encode() + b"]"
+
+async def stream_rows(query: str):
+    """Yields the JSON rows of a row JSON query as an array, one cursor batch at a time."""
+    async with pool.acquire() as conn:
+        # asyncpg cursors only exist inside a transaction
+        async with conn.transaction():
+            cursor = await conn.cursor(query)
+            yield b"["
+            separator = b""
+            while rows := await cursor.fetch(STREAM_BATCH_SIZE):
+                yield separator + ",".join([row[0] for row in rows]).encode()
+                separator = b","
+            yield b"]"
 
 # --- Load schema information on server startup ---
-@app.on_event("startup")
-async def startup_event():
-    """Pre-loads table schema information on server startup."""
-    print('Fetching schemas for tables:', table_names)
-    conn = None
+# One round trip for every managed table; rows are grouped by table_name.
+# data_type matches information_schema.columns (e.g. "ARRAY", "character varying"),
+# which the UI relies on. cast_type is the schema-qualified name of the type
+# without modifiers (domains resolve to their base type, as udt_name does):
+# regtype would print bpchar as "character", which casts to char(1) and truncates.
+SCHEMA_QUERY = """
+    SELECT
+        c.relname AS table_name,
+        a.attname AS column_name,
+        CASE
+            WHEN bt.typelem <> 0 AND bt.typlen = -1 THEN 'ARRAY'
+            WHEN bn.nspname = 'pg_catalog' THEN format_type(bt.oid, NULL)
+            ELSE 'USER-DEFINED'
+        END AS data_type,
+        CASE WHEN a.attnotnull THEN 'NO' ELSE 'YES' END AS is_nullable,
+        COALESCE(i.indisprimary, false) AS is_primary_key,
+        quote_ident(bn.nspname) || '.' || quote_ident(bt.typname) AS cast_type
+    FROM
+        pg_catalog.pg_class c
+        JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+        JOIN pg_catalog.pg_attribute a ON a.attrelid = c.oid
+        JOIN pg_catalog.pg_type t ON t.oid = a.atttypid
+        JOIN pg_catalog.pg_type bt
+            ON bt.oid = CASE WHEN t.typtype = 'd' THEN t.typbasetype ELSE t.oid END
+        JOIN pg_catalog.pg_namespace bn ON bn.oid = bt.typnamespace
+        LEFT JOIN pg_catalog.pg_index i
+            ON i.indrelid = c.oid AND i.indisprimary AND a.attnum = ANY(i.indkey)
+    WHERE
+        n.nspname = 'public'
+        AND c.relname = ANY($1::text[])
+        AND a.attnum > 0
+        AND NOT a.attisdropped
+    ORDER BY
+        c.relname, a.attnum;
+"""
+
+def schema_cache_path():
+    """Returns the schema cache file for this database and table list, or None if disabled."""
+    if not SCHEMA_CACHE_DIR:
+        return None
+    # SCHEMA_QUERY is part of the key so caches written by an older query are not reused
+    key = hashlib.blake2b(f"{DATABASE_URL}|{','.join(sorted(table_names))}|{SCHEMA_QUERY}".encode()).hexdigest()
+    return os.path.join(SCHEMA_CACHE_DIR, f"schema_{key}.json")
+
+def load_schema_cache():
+    """Fills the schema dictionaries from the on-disk cache. Returns True on a hit."""
+    path = schema_cache_path()
+    if not path:
+        return False
     try:
-        conn = pool.getconn()
-        with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cur:
-            for table_name in table_names:
-                try:
-                    query = """
-                        SELECT
-                            c.column_name,
-                            c.data_type,
-                            c.is_nullable,
-                            (SELECT COUNT(*)
-                             FROM information_schema.table_constraints tc
-                             JOIN information_schema.key_column_usage kcu
-                             ON tc.constraint_name = kcu.constraint_name
-                             WHERE tc.table_name = c.table_name
-                             AND tc.constraint_type = 'PRIMARY KEY'
-                             AND kcu.column_name = c.column_name
-                            ) = 1 as is_primary_key
-                        FROM
-                            information_schema.columns c
-                        WHERE
-                            c.table_name = %s
-                            AND c.table_schema = 'public'
-                        ORDER BY
-                            c.ordinal_position;
-                    """
-                    cur.execute(query, (table_name,))
-                    rows = [dict(row) for row in cur.fetchall()]
-                    if rows:
-                        primary_key = next((col['column_name'] for col in rows if col['is_primary_key']), None)
-                        table_schemas[table_name] = {
-                            "columns": rows,
-                            "primaryKey": primary_key,
-                        }
-                        print(f"'{table_name}' schema loaded. Primary key: {primary_key or 'None'}")
-                    else:
-                        print(f"Warning: Table '{table_name}' not found or has no columns.")
-                except Exception as e:
-                    print(f"Error fetching schema for table '{table_name}':", e)
-    finally:
-        if conn:
-            pool.putconn(conn)
+        with open(path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        schemas, types = cached["schemas"], cached["columnTypes"]
+        # A file of the wrong shape is treated as a miss
+        if (schemas.keys() != types.keys()
+                or not all(isinstance(t, dict) for t in types.values())
+                or not all("columns" in schema and "primaryKey" in schema for schema in schemas.values())):
+            return False
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return False
+    table_schemas.update(schemas)
+    column_types.update(types)
+    return True
+
+def save_schema_cache(schemas: Dict[str, Any], types: Dict[str, Dict[str, str]]):
+    """Writes loaded schemas and column types to the on-disk cache."""
+    path = schema_cache_path()
+    if not path:
+        return
+    try:
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"schemas": schemas, "columnTypes": types}, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print("Warning: could not write schema cache:", e)
+
+async def load_schemas():
+    """Loads table schema information from the database and rebuilds the statements.
+
+    Raises if the catalog query fails; the loaded schemas are left unchanged.
+    """
+    print('Fetching schemas for tables:', table_names)
+    rows = await pool.fetch(SCHEMA_QUERY, table_names)
+    schemas, types = {}, {}
+    for table_name, group in itertools.groupby(rows, key=lambda row: row['table_name']):
+        columns = [dict(row) for row in group]
+        types[table_name] = {}
+        for col in columns:
+            del col['table_name']
+            types[table_name][col['column_name']] = col.pop('cast_type')
+        primary_key = next((col['column_name'] for col in columns if col['is_primary_key']), None)
+        schemas[table_name] = {
+            "columns": columns,
+            "primaryKey": primary_key,
+        }
+        print(f"'{table_name}' schema loaded. Primary key: {primary_key or 'None'}")
+    # Swap in the schemas and every derived statement without awaiting in
+    # between, so no request sees a new schema with old statements
+    table_schemas.clear()
+    table_schemas.update(schemas)
+    column_types.clear()
+    column_types.update(types)
+    build_statements()
+    for table_name in table_names:
+        invalidate_data(table_name)
+    missing = [table_name for table_name in table_names if table_name not in table_schemas]
+    for table_name in missing:
+        print(f"Warning: Table '{table_name}' not found or has no columns.")
+    # Only cache complete results so missing tables are retried on the next start
+    if not missing:
+        await asyncio.to_thread(save_schema_cache, schemas, types)
+
+def load_index_html():
+    """Reads index.html into memory and computes its ETag."""
+    global INDEX_HTML, INDEX_ETAG
+    with open("public/index.html", "rb") as f:
+        INDEX_HTML = f.read()
+    INDEX_ETAG = f'"{hashlib.blake2b(INDEX_HTML, digest_size=16).hexdigest()}"'
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Creates the connection pool and pre-loads table schemas; closes connections on exit."""
+    global pool
+
+    # Independent startup I/O runs concurrently. create_pool opens its
+    # DB_POOL_MIN connections in parallel, so the first requests find them ready.
+    pool, _, cached = await asyncio.gather(
+        asyncpg.create_pool(
+            dsn=DATABASE_URL,
+            min_size=DB_POOL_MIN,
+            max_size=DB_POOL_MAX,
+            max_queries=50000,
+            max_inactive_connection_lifetime=600,
+            # asyncpg prepares each distinct query text once per connection and
+            # reuses it from this cache, so the stable statement templates skip
+            # parse/plan after their first use
+            statement_cache_size=DB_STATEMENT_CACHE_SIZE,
+        ),
+        asyncio.to_thread(load_index_html),
+        asyncio.to_thread(load_schema_cache),
+    )
+
+    if cached:
+        print('Schemas loaded from cache for tables:', table_names)
+        build_statements()
+    else:
+        try:
+            await load_schemas()
+        except Exception as e:
+            print("Error fetching table schemas:", e)
+    if LIVE_UPDATES:
+        await asyncio.gather(install_notify_triggers(), start_listener())
     if not table_names:
         print('Warning: "TABLES" environment variable not set in .env file. No tables to manage.')
 
+    try:
+        yield
+    finally:
+        if listener_task:
+            listener_task.cancel()
+        if listener_conn:
+            listener_conn.remove_termination_listener(on_listener_closed)
+            await listener_conn.close()
+        await pool.close()
+
+# --- FastAPI application setup ---
+app = FastAPI(default_response_class=OrjsonResponse, lifespan=lifespan)
+
+# Table data compresses well; small responses are not worth the CPU.
+# Server-sent event streams are left uncompressed by the middleware.
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+# Mount for serving static files (HTML, JS, CSS)
+app.mount("/static", StaticFiles(directory="public"), name="static")
+
 
 # --- API Routes ---
 
-@app.get("/", response_class=HTMLResponse)
-async def read_root():
+@app.get("/", response_class=HTMLResponse, response_model=None)
+async def read_root(request: Request):
     """Returns the main HTML page."""
-    with open("public/index.html", "r", encoding="utf-8") as f:
-        return HTMLResponse(content=f.read())
+    headers = {"ETag": INDEX_ETAG}
+    if request.headers.get("if-none-match") == INDEX_ETAG:
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(content=INDEX_HTML, headers=headers)
 
-@app.get("/api/schema")
+@app.get("/api/schema", response_model=None)
 async def get_schema():
     """Returns the list of tables and their schemas."""
     if not table_schemas:
         raise HTTPException(status_code=404, detail="No tables to manage or schemas could not be loaded.")
-    return {"tables": table_names, "schemas": table_schemas}
+    return OrjsonResponse({"tables": table_names, "schemas": table_schemas})
 
-@app.get("/api/data/{table}")
-async def get_data(table: str, conn=Depends(get_db_connection), sort_by: str = None, sort_order: str = 'asc'):
-    """Retrieves and sorts data for a specific table."""
+@app.post("/api/schema/refresh", response_model=None)
+async def refresh_schema():
+    """Reloads table schemas from the database and rewrites the schema cache."""
+    try:
+        await load_schemas()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching table schemas: {e}")
+    if LIVE_UPDATES:
+        await install_notify_triggers()
+    return await get_schema()
+
+@app.get("/api/data/{table}", response_model=None)
+async def get_data(table: str, sort_by: str = None, sort_order: str = 'asc', stream: bool = False):
+    """Retrieves and sorts data for a specific table.
+
+    With ?stream=1 the rows are sent incrementally from a server-side cursor
+    instead of being loaded into memory first; use it for large tables.
+    Rows are PostgreSQL's JSON for the row either way, as in the write responses.
+    """
     if table not in table_names:
         raise HTTPException(status_code=404, detail="Unknown table.")
 
@@ -124,57 +636,118 @@ async def get_data(table: str, conn=Depends(get_db_connection), sort_by: str = N
     if not schema:
         raise HTTPException(status_code=404, detail="Table schema not found.")
 
-    order_by_clause = ""
-    if sort_by:
-        valid_columns = [col['column_name'] for col in schema['columns']]
-        if sort_by not in valid_columns:
+    # Every valid sort has a precomputed query, so one lookup validates it
+    sort_key = (sort_by, sort_order.lower()) if sort_by else DEFAULT_SORT
+    queries = select_queries[table].get(sort_key)
+    if queries is None:
+        if sort_by not in column_types[table]:
             raise HTTPException(status_code=400, detail="Invalid sort column.")
+        raise HTTPException(status_code=400, detail="Invalid sort order.")
 
-        if sort_order.lower() not in ['asc', 'desc']:
-            raise HTTPException(status_code=400, detail="Invalid sort order.")
+    if stream:
+        return StreamingResponse(stream_rows(queries[0]), media_type="application/json")
 
-        order_by_clause = f'ORDER BY "{sort_by}" {sort_order.upper()}'
-    else:
-        primary_key = schema.get("primaryKey")
-        if primary_key:
-            order_by_clause = f'ORDER BY "{primary_key}" ASC'
+    body = await fetch_table_json(table, sort_key)
+    return Response(content=body, media_type="application/json")
 
-    try:
-        with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cur:
-            query = f'SELECT * FROM "{table}" {order_by_clause}'
-            cur.execute(query)
-            result = [dict(row) for row in cur.fetchall()]
-            return jsonable_encoder(result)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching data: {e}")
+@app.get("/api/data/{table}/stream", response_model=None)
+async def stream_changes(table: str):
+    """Server-sent events: the table's rows, then each row change as it happens.
 
-@app.post("/api/data/{table}")
+    Sends a "snapshot" event with the rows as a JSON array, then a "change"
+    event per inserted, updated or deleted row ({"t", "op", "row"}). A new
+    snapshot is sent if the client falls behind or the listener reconnects.
+    """
+    if not LIVE_UPDATES:
+        raise HTTPException(status_code=404, detail="Live updates are disabled.")
+    if table not in table_names:
+        raise HTTPException(status_code=404, detail="Unknown table.")
+    if table not in table_schemas:
+        raise HTTPException(status_code=404, detail="Table schema not found.")
+
+    # Subscribe before taking the snapshot so no change falls in between
+    queue = asyncio.Queue(maxsize=SSE_QUEUE_SIZE)
+    change_subscribers.setdefault(table, set()).add(queue)
+    try:
+        snapshot = await fetch_table_json(table, DEFAULT_SORT)
+    except Exception:
+        change_subscribers[table].discard(queue)
+        raise
+    return StreamingResponse(
+        change_events(table, queue, snapshot),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post("/api/data/{table}", response_model=None)
 async def create_data(table: str, request: Request, conn=Depends(get_db_connection)):
     """Adds a new record to the table."""
     if table not in table_names:
         raise HTTPException(status_code=404, detail="Unknown table.")
 
+    if table not in column_types:
+        raise HTTPException(status_code=404, detail="Table schema not found.")
+
     data = await request.json()
-    columns = data.keys()
-    values = data.values()
+    columns = tuple(data)
+    array_cols = array_columns[table]
+    values = tuple(to_text(data[col], col in array_cols) for col in columns)
+    query = insert_statement(table, columns)
 
-    cols_str = ", ".join([f'"{col}"' for col in columns])
-    vals_str = ", ".join(["%s"] * len(values))
+    try:
+        new_record = await conn.fetchval(query, *values)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error adding data: {e}")
+    invalidate_data(table)
+    return Response(content=new_record, status_code=201, media_type="application/json")
 
-    query = f'INSERT INTO "{table}" ({cols_str}) VALUES ({vals_str}) RETURNING *'
+@app.post("/api/data/{table}/bulk", response_model=None)
+async def create_data_bulk(table: str, request: Request, returning: bool = False, conn=Depends(get_db_connection)):
+    """Adds a JSON array of records to the table in a single statement.
+
+    Returns the number of inserted rows, or the rows themselves with ?returning=1.
+    """
+    if table not in table_names:
+        raise HTTPException(status_code=404, detail="Unknown table.")
+
+    types = column_types.get(table)
+    if not types:
+        raise HTTPException(status_code=404, detail="Table schema not found.")
+
+    records = await request.json()
+    if not isinstance(records, list) or not records or not all(isinstance(r, dict) and r for r in records):
+        raise HTTPException(status_code=400, detail="Expected a non-empty JSON array of objects.")
+
+    columns = list(records[0])
+    if any(record.keys() != records[0].keys() for record in records):
+        raise HTTPException(status_code=400, detail="All records must have the same columns.")
+    check_columns(table, tuple(columns))
+
+    # One text[] parameter per column, unnested into rows and cast to the column types
+    cols_str = ", ".join([quoted_columns[table][col] for col in columns])
+    select_str = ", ".join([f"u.c{i}::{types[col]}" for i, col in enumerate(columns, 1)])
+    arrays_str = ", ".join([f"${i}::text[]" for i in range(1, len(columns) + 1)])
+    aliases_str = ", ".join([f"c{i}" for i in range(1, len(columns) + 1)])
+    query = f'INSERT INTO "{table}" AS t ({cols_str}) SELECT {select_str} FROM unnest({arrays_str}) AS u({aliases_str})'
+    array_cols = array_columns[table]
+    arrays = [[to_text(record[col], col in array_cols) for record in records] for col in columns]
 
     try:
-        with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cur:
-            cur.execute(query, list(values))
-            new_record = cur.fetchone()
-            conn.commit()
-            return JSONResponse(content=jsonable_encoder(new_record), status_code=201)
+        if returning:
+            new_records = await conn.fetch(f"{query} RETURNING {ROW_JSON}", *arrays)
+        else:
+            status = await conn.execute(query, *arrays)
     except Exception as e:
-        conn.rollback()
         raise HTTPException(status_code=500, detail=f"Error adding data: {e}")
+    invalidate_data(table)
+    if returning:
+        return Response(content=json_array(row[0] for row in new_records), status_code=201,
+                        media_type="application/json")
+    # Command tag is "INSERT 0 <rows>"
+    return OrjsonResponse({"inserted": int(status.split()[-1])}, status_code=201)
 
 
-@app.put("/api/data/{table}/{item_id}")
+@app.put("/api/data/{table}/{item_id}", response_model=None)
 async def update_data(table: str, item_id: str, request: Request, conn=Depends(get_db_connection)):
     """Updates an existing record."""
     schema = table_schemas.get(table)
@@ -185,27 +758,25 @@ async def update_data(table: str, item_id: str, request: Request, conn=Depends(g
     data = await request.json()
 
     data.pop(primary_key, None)
+    if not data:
+        raise HTTPException(status_code=400, detail="No columns to update.")
 
-    columns = data.keys()
-    values = list(data.values())
-
-    set_clause = ", ".join([f'"{col}" = %s' for col in columns])
-    query = f'UPDATE "{table}" SET {set_clause} WHERE "{primary_key}" = %s RETURNING *'
+    columns = tuple(data)
+    array_cols = array_columns[table]
+    values = tuple(to_text(data[col], col in array_cols) for col in columns)
+    query = update_statement(table, columns)
 
     try:
-        with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cur:
-            cur.execute(query, values + [item_id])
-            if cur.rowcount == 0:
-                raise HTTPException(status_code=404, detail="Record with the specified ID not found.")
-            updated_record = cur.fetchone()
-            conn.commit()
-            return jsonable_encoder(updated_record)
+        updated_record = await conn.fetchval(query, *values, item_id)
     except Exception as e:
-        conn.rollback()
         raise HTTPException(status_code=500, detail=f"Error updating data: {e}")
+    if updated_record is None:
+        raise HTTPException(status_code=404, detail="Record with the specified ID not found.")
+    invalidate_data(table)
+    return Response(content=updated_record, media_type="application/json")
 
 
-@app.delete("/api/data/{table}/{item_id}")
+@app.delete("/api/data/{table}/{item_id}", response_model=None)
 async def delete_data(table: str, item_id: str, conn=Depends(get_db_connection)):
     """Deletes a record."""
     schema = table_schemas.get(table)
@@ -213,18 +784,18 @@ async def delete_data(table: str, item_id: str, conn=Depends(get_db_connection))
         raise HTTPException(status_code=400, detail="Cannot delete from a table with no primary key defined.")
 
     primary_key = schema["primaryKey"]
-    query = f'DELETE FROM "{table}" WHERE "{primary_key}" = %s'
+    pk_placeholder = placeholders(table, [primary_key])[0]
+    query = f'DELETE FROM "{table}" WHERE {quoted_columns[table][primary_key]} = {pk_placeholder}'
 
     try:
-        with conn.cursor() as cur:
-            cur.execute(query, (item_id,))
-            if cur.rowcount == 0:
-                raise HTTPException(status_code=404, detail="Record with the specified ID not found.")
-            conn.commit()
-            return JSONResponse(content={}, status_code=204)
+        status = await conn.execute(query, item_id)
     except Exception as e:
-        conn.rollback()
         raise HTTPException(status_code=500, detail=f"Error deleting data: {e}")
+    # asyncpg returns the command tag, e.g. "DELETE 1"
+    if status.split()[-1] == "0":
+        raise HTTPException(status_code=404, detail="Record with the specified ID not found.")
+    invalidate_data(table)
+    return Response(status_code=204)
 
 # --- Uvicorn server execution (for development) ---
 if __name__ == "__main__":